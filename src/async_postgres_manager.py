@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Async PostgreSQL Database Manager
+
+asyncio counterpart of PostgreSQLDatabaseManager built on asyncpg, for
+library callers that issue many independent queries concurrently:
+- Per-database asyncpg connection pools
+- Database and extension management
+- Query execution that overlaps round-trips across pooled connections
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+def _quote_ident(name: str) -> str:
+    """Quote an SQL identifier (asyncpg has no psycopg2.sql equivalent)."""
+    return '"' + name.replace('"', '""') + '"'
+
+class AsyncPostgreSQLDatabaseManager:
+    def __init__(
+        self,
+        user: str,
+        password: str,
+        host: str,
+        port: int = 5432,
+        min_connections: int = 1,
+        max_connections: int = 10,
+        extensions: Optional[List[str]] = None
+    ):
+        """
+        Initialize async database manager. Pools are opened lazily.
+
+        Args:
+            user: Database username
+            password: Database password
+            host: Database host
+            port: Database port
+            min_connections: Minimum connection pool size
+            max_connections: Maximum connection pool size
+            extensions: List of extensions to ensure exist
+        """
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.extensions = extensions or ['postgis']
+        self._pools: Dict[str, asyncpg.Pool] = {}
+        self._pools_lock = asyncio.Lock()
+
+    async def _get_pool(self, database: str = 'postgres') -> asyncpg.Pool:
+        """Return the connection pool for database, creating it on first use."""
+        async with self._pools_lock:
+            pool = self._pools.get(database)
+            if pool is None:
+                try:
+                    pool = await asyncpg.create_pool(
+                        user=self.user,
+                        password=self.password,
+                        host=self.host,
+                        port=self.port,
+                        database=database,
+                        min_size=self.min_connections,
+                        max_size=self.max_connections,
+                        server_settings={'application_name': 'osm-pipeline'}
+                    )
+                    logger.info("Initialized connection pool for '%s'", database)
+                except (asyncpg.PostgresError, OSError) as e:
+                    logger.error("Failed to initialize connection pool: %s", e)
+                    raise
+                self._pools[database] = pool
+            return pool
+
+    async def ensure_database(self, db_name: str, template: str = 'template1') -> bool:
+        """
+        Ensure database exists with the configured extensions.
+
+        Args:
+            db_name: Name of database to ensure
+            template: Template database to use
+
+        Returns:
+            bool: True if database was created, False if it already existed
+        """
+        try:
+            pool = await self._get_pool()
+            async with pool.acquire() as conn:
+                exists = await conn.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM pg_database WHERE datname = $1)",
+                    db_name
+                )
+                if not exists:
+                    logger.info("Creating database '%s'", db_name)
+                    await conn.execute(
+                        f"CREATE DATABASE {_quote_ident(db_name)} "
+                        f"WITH TEMPLATE = {_quote_ident(template)}"
+                    )
+                else:
+                    logger.info("Database '%s' already exists", db_name)
+
+            await self._ensure_extensions(db_name)
+            return not exists
+
+        except asyncpg.PostgresError as e:
+            logger.error("Error ensuring database '%s': %s", db_name, e)
+            raise
+
+    async def _ensure_extensions(self, db_name: str) -> None:
+        """Ensure required extensions exist in database."""
+        # A single multi-statement script rather than concurrent statements:
+        # one connection runs one query at a time, and extensions may depend
+        # on each other (e.g. postgis_topology on postgis)
+        script = ";".join(
+            f"CREATE EXTENSION IF NOT EXISTS {_quote_ident(extension)}"
+            for extension in self.extensions
+        )
+        try:
+            pool = await self._get_pool(db_name)
+            async with pool.acquire() as conn:
+                await conn.execute(script)
+            logger.info("Ensured extensions %s in '%s'", self.extensions, db_name)
+        except asyncpg.PostgresError as e:
+            logger.error("Error ensuring extensions: %s", e)
+            raise
+
+    async def execute_sql(self, db_name: str, query: str, *args: Any) -> List[asyncpg.Record]:
+        """
+        Execute SQL query with $1..$n positional parameters.
+
+        Independent calls can be awaited together with asyncio.gather; each
+        runs on its own pooled connection so their round-trips overlap.
+
+        Args:
+            db_name: Database name
+            query: SQL query to execute
+            *args: Query parameters
+
+        Returns:
+            Result rows (empty for statements that return none)
+        """
+        try:
+            pool = await self._get_pool(db_name)
+            async with pool.acquire() as conn:
+                return await conn.fetch(query, *args)
+        except asyncpg.PostgresError as e:
+            logger.error("SQL execution failed: %s", e)
+            raise
+
+    async def close(self) -> None:
+        """Close all connections in every pool."""
+        async with self._pools_lock:
+            await asyncio.gather(*(pool.close() for pool in self._pools.values()))
+            self._pools.clear()
+        logger.info("Closed all database connections")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Pipeline Cache Location
+
+On-disk cache shared by the OSM download cache and the database setup
+markers.
+"""
+
+import os
+from pathlib import Path
+
+# Shared across runs and working directories; override with $OSM_CACHE
+CACHE_FOLDER = Path(os.environ.get("OSM_CACHE", "~/.cache/osm-pipeline")).expanduser()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+COPY Text Formatting
+
+Streams rows to PostgreSQL's COPY FROM STDIN in text format, shared by the
+database manager and the PostGIS loader.
+"""
+
+import io
+from typing import Any, Iterable, Optional, Sequence
+
+class CopyTextReader(io.TextIOBase):
+    """Readable file over an iterable of rows, formatted as COPY text on demand.
+
+    None is written as \\N (NULL) and every other value as its escaped str(),
+    so empty strings stay empty strings.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]], sep: str = '\t'):
+        self._rows = iter(rows)
+        self._sep = sep
+        self._buffer = ''
+        self._escapes = str.maketrans({
+            '\\': '\\\\', '\n': '\\n', '\r': '\\r', sep: '\\' + sep
+        })
+
+    def readable(self) -> bool:
+        return True
+
+    def _format(self, row: Sequence[Any]) -> str:
+        return self._sep.join(
+            '\\N' if value is None else str(value).translate(self._escapes)
+            for value in row
+        ) + '\n'
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            data = self._buffer + ''.join(self._format(row) for row in self._rows)
+            self._buffer = ''
+            return data
+        while len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += self._format(row)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
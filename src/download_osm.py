@@ -4,21 +4,27 @@ OSM Data Downloader
 
 Downloads OpenStreetMap data for a specified location with configurable:
 - Feature types (buildings, roads, amenities)
-- Geographic extent
+- Geographic extent (geocoded with OSMnx, queried directly from Overpass)
 - Download retry logic
 """
 
+import hashlib
 import logging
+import re
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
 import geopandas as gpd
+import numpy as np
 import osmnx as ox
+import requests
+import shapely
 from retrying import retry
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from cache import CACHE_FOLDER
+from fast_json import json_loads
+
 logger = logging.getLogger(__name__)
 
 # Default tags to download
@@ -30,13 +36,153 @@ DEFAULT_TAGS = {
     "natural": True,
 }
 
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+# Which closed ways become polygons, per tag key; the same rules OSMnx
+# applies in features_from_place. "all": any value; "passlist": only the
+# listed values; "blocklist": any value except those listed. Closed ways
+# matching no rule stay lines, and area=no always keeps a line.
+POLYGON_FEATURES = {
+    "aeroway": {"polygon": "blocklist", "values": {"taxiway"}},
+    "amenity": {"polygon": "all"},
+    "area": {"polygon": "all"},
+    "area:highway": {"polygon": "all"},
+    "barrier": {
+        "polygon": "passlist",
+        "values": {"city_wall", "ditch", "hedge", "retaining_wall", "spikes"},
+    },
+    "boundary": {"polygon": "all"},
+    "building": {"polygon": "all"},
+    "building:part": {"polygon": "all"},
+    "craft": {"polygon": "all"},
+    "golf": {"polygon": "all"},
+    "highway": {"polygon": "passlist", "values": {"services", "rest_area", "escape", "elevator"}},
+    "historic": {"polygon": "all"},
+    "indoor": {"polygon": "all"},
+    "landuse": {"polygon": "all"},
+    "leisure": {"polygon": "all"},
+    "man_made": {"polygon": "blocklist", "values": {"cutline", "embankment", "pipeline"}},
+    "military": {"polygon": "all"},
+    "natural": {
+        "polygon": "blocklist",
+        "values": {"coastline", "cliff", "ridge", "arete", "tree_row"},
+    },
+    "office": {"polygon": "all"},
+    "place": {"polygon": "all"},
+    "power": {
+        "polygon": "passlist",
+        "values": {"plant", "substation", "generator", "transformer"},
+    },
+    "public_transport": {"polygon": "all"},
+    "railway": {
+        "polygon": "passlist",
+        "values": {"station", "turntable", "roundhouse", "platform"},
+    },
+    "ruins": {"polygon": "all"},
+    "shop": {"polygon": "all"},
+    "tourism": {"polygon": "all"},
+    "waterway": {"polygon": "passlist", "values": {"riverbank", "dock", "boatyard", "dam"}},
+}
+
+def _quote(text: str) -> str:
+    """Quote a tag key or value for an Overpass filter."""
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _tag_filters(tags: Dict) -> List[str]:
+    """Translate an OSMnx-style tags dict into Overpass tag filters."""
+    filters = []
+    for key, value in tags.items():
+        if value is True:
+            filters.append(f"[{_quote(key)}]")
+        elif isinstance(value, str):
+            filters.append(f"[{_quote(key)}={_quote(value)}]")
+        else:
+            # One anchored regex per key instead of a statement per value
+            pattern = "^(" + "|".join(re.escape(str(v)) for v in value) + ")$"
+            filters.append(f"[{_quote(key)}~{_quote(pattern)}]")
+    return filters
+
+def _is_area(tags: Dict) -> bool:
+    """Decide whether a closed way should become a polygon, per POLYGON_FEATURES."""
+    if tags.get("area") == "no":
+        return False
+    for key in POLYGON_FEATURES.keys() & tags.keys():
+        rule = POLYGON_FEATURES[key]
+        if rule["polygon"] == "all":
+            return True
+        if (tags[key] in rule["values"]) == (rule["polygon"] == "passlist"):
+            return True
+    return False
+
+def _way_geometries(ways: List[Dict]) -> np.ndarray:
+    """Build LineStrings/Polygons for ways returned with ``out geom``."""
+    counts = np.array([len(way["geometry"]) for way in ways], dtype=np.intp)
+    coords = np.array(
+        [(node["lon"], node["lat"]) for way in ways for node in way["geometry"]],
+        dtype=float,
+    ).reshape(-1, 2)
+    owner = np.repeat(np.arange(len(ways)), counts)
+
+    ends = np.cumsum(counts) - 1
+    starts = ends - counts + 1
+    closed = (counts >= 4) & np.all(coords[starts] == coords[ends], axis=1)
+    polygon = closed & np.array([_is_area(way.get("tags", {})) for way in ways])
+
+    geoms = np.empty(len(ways), dtype=object)
+    for mask, build in ((polygon, shapely.linearrings), (~polygon, shapely.linestrings)):
+        rows = mask[owner]
+        if rows.any():
+            _, indices = np.unique(owner[rows], return_inverse=True)
+            geoms[mask] = build(coords[rows], indices=indices)
+    geoms[polygon] = shapely.polygons(geoms[polygon])
+    return geoms
+
+def _relation_geometry(relation: Dict):
+    """Assemble a (multi)polygon from a multipolygon relation's member ways."""
+    rings = {"outer": [], "inner": []}
+    for member in relation.get("members", []):
+        if member["type"] == "way" and len(member.get("geometry") or []) >= 2:
+            line = shapely.linestrings([(n["lon"], n["lat"]) for n in member["geometry"]])
+            rings["inner" if member.get("role") == "inner" else "outer"].append(line)
+
+    outer = shapely.union_all(shapely.polygonize(rings["outer"]).geoms)
+    inner = shapely.union_all(shapely.polygonize(rings["inner"]).geoms)
+    return outer.difference(inner)
+
+def _elements_to_gdf(elements: List[Dict]) -> gpd.GeoDataFrame:
+    """Convert Overpass JSON elements into a GeoDataFrame in EPSG:4326."""
+    nodes = [e for e in elements if e["type"] == "node"]
+    ways = [e for e in elements if e["type"] == "way" and len(e.get("geometry") or []) >= 2]
+    relations = [
+        e for e in elements
+        if e["type"] == "relation"
+        and e.get("tags", {}).get("type") in ("multipolygon", "boundary")
+    ]
+
+    node_geoms = shapely.points([(n["lon"], n["lat"]) for n in nodes]) if nodes else []
+    way_geoms = _way_geometries(ways) if ways else []
+    relation_geoms = [_relation_geometry(r) for r in relations]
+
+    kept = nodes + ways + relations
+    records = [
+        {"element_type": e["type"], "osmid": e["id"], **e.get("tags", {})}
+        for e in kept
+    ]
+    geometry = np.concatenate([
+        np.asarray(node_geoms, dtype=object),
+        np.asarray(way_geoms, dtype=object),
+        np.asarray(relation_geoms, dtype=object),
+    ])
+    return gpd.GeoDataFrame(records, geometry=geometry, crs="EPSG:4326")
+
 class OSMDownloader:
     def __init__(
         self,
         location_name: str,
         tags: Optional[Dict] = None,
         timeout: int = 300,
-        max_retries: int = 3
+        max_retries: int = 3,
+        use_cache: bool = True
     ):
         """
         Initialize OSM downloader.
@@ -46,17 +192,28 @@ class OSMDownloader:
             tags: OSM tags to download (defaults to buildings, roads, amenities)
             timeout: Request timeout in seconds
             max_retries: Maximum download attempts
+            use_cache: Reuse a previous download of the same location and tags
         """
         self.location_name = location_name
         self.tags = tags or DEFAULT_TAGS
         self.timeout = timeout
         self.max_retries = max_retries
+        self.use_cache = use_cache
         
         # Configure OSMnx
         ox.settings.timeout = timeout
         ox.settings.log_console = True
-        ox.settings.use_cache = True
-        ox.settings.cache_folder = Path(".osmnx_cache")
+        ox.settings.use_cache = use_cache
+        ox.settings.cache_folder = CACHE_FOLDER
+
+    @property
+    def cache_path(self) -> Path:
+        """Cached download for this exact location and tag selection."""
+        key = hashlib.blake2b(
+            repr(sorted(self.tags.items())).encode() + self.location_name.encode(),
+            digest_size=16
+        ).hexdigest()
+        return CACHE_FOLDER / f"{key}.parquet"
 
     @retry(stop_max_attempt_number=3, wait_fixed=2000)
     def download(self) -> gpd.GeoDataFrame:
@@ -73,16 +230,40 @@ class OSMDownloader:
         try:
             logger.info(f"?? Downloading OSM data for: {self.location_name}")
             logger.debug(f"Using tags: {self.tags}")
+
+            if self.use_cache and self.cache_path.exists():
+                gdf = gpd.read_parquet(self.cache_path)
+                logger.info(f"? Loaded {len(gdf)} cached features from {self.cache_path}")
+                return gdf
             
             start_time = time.time()
-            gdf = ox.features_from_place(
-                self.location_name,
-                tags=self.tags,
-                which_result=None  # Let OSMnx choose best result
+            boundary = ox.geocode_to_gdf(self.location_name)
+            west, south, east, north = boundary.total_bounds
+
+            # Global bbox scopes every statement; "qt" skips the server's id sort
+            statements = "".join(f"nwr{f};" for f in _tag_filters(self.tags))
+            query = (
+                f"[out:json][timeout:{self.timeout}][bbox:{south},{west},{north},{east}];"
+                f"({statements});out geom qt;"
+            )
+
+            response = requests.post(
+                OVERPASS_URL, data={"data": query}, timeout=self.timeout
             )
+            response.raise_for_status()
+            payload = json_loads(response.content)
+            if "runtime error" in payload.get("remark", ""):
+                raise RuntimeError(f"Overpass error: {payload['remark']}")
+
+            gdf = _elements_to_gdf(payload.get("elements", []))
+            # Overpass answers for the bounding box; keep what touches the place
+            gdf = gdf[gdf.intersects(boundary.geometry.iloc[0])]
             
             duration = time.time() - start_time
             logger.info(f"? Downloaded {len(gdf)} features in {duration:.1f}s")
+
+            if self.use_cache:
+                self._write_cache(gdf)
             return gdf
 
         except ox._errors.InsufficientResponseError as e:
@@ -92,6 +273,14 @@ class OSMDownloader:
             logger.warning(f"Attempt failed: {str(e)}")
             raise
 
+    def _write_cache(self, gdf: gpd.GeoDataFrame) -> None:
+        """Store a download for reuse; failures only cost the next run a fetch."""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            gdf.to_parquet(self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not cache download: {str(e)}")
+
     def save(self, output_path: Union[str, Path]) -> None:
         """
         Download and save OSM data to file.
@@ -111,8 +300,9 @@ class OSMDownloader:
             
             # Determine driver from file extension
             driver = "GeoJSON" if output_path.suffix.lower() == ".geojson" else "GPKG"
+            options = {"SPATIAL_INDEX": "NO"} if driver == "GPKG" else {}
             
-            gdf.to_file(output_path, driver=driver)
+            gdf.to_file(output_path, driver=driver, engine="pyogrio", **options)
             logger.info(f"?? Saved {len(gdf)} features to {output_path}")
             
         except Exception as e:
@@ -139,6 +329,7 @@ def download_osm_data(
 if __name__ == "__main__":
     # Example command-line usage
     import argparse
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("location", help="Place name to download")
     parser.add_argument("output", help="Output file path")
@@ -147,8 +338,6 @@ if __name__ == "__main__":
     
     tags = DEFAULT_TAGS
     if args.tags:
-        import json
-        with open(args.tags) as f:
-            tags = json.load(f)
+        tags = json_loads(Path(args.tags).read_bytes())
     
     download_osm_data(args.location, args.output, tags=tags)
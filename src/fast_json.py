@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+JSON Parsing
+
+Fastest available JSON decoder, shared by the downloader and the pipeline
+config loader: orjson if installed, then ujson, then the stdlib json.
+"""
+
+try:
+    from orjson import JSONDecodeError, loads as json_loads
+except ImportError:
+    try:
+        from ujson import JSONDecodeError, loads as json_loads
+    except ImportError:
+        from json import JSONDecodeError, loads as json_loads
@@ -12,7 +12,6 @@ Usage:
 """
 
 import argparse
-import json
 import logging
 import os
 import sys
@@ -21,9 +20,10 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from download_osm import OSMDownloader
-from geo_cleaner import GeoCleaner
+from geo_cleaner import GeoCleaner, clean_in_batches
 from postgres_manager import PostgreSQLDatabaseManager
 from postgis_loader import PostGISLoader
+from fast_json import JSONDecodeError, json_loads
 
 # Constants
 DEFAULT_CONFIG_PATH = "settings.json"
@@ -63,6 +63,11 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip database operations"
     )
+    parser.add_argument(
+        "--save-cleaned",
+        action="store_true",
+        help="Write the cleaned data file even when loading it to the database"
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -91,8 +96,7 @@ def setup_logging(verbose: bool = False, debug: bool = False) -> None:
 def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
     """Load and validate configuration file."""
     try:
-        with open(config_path) as f:
-            config = json.load(f)
+        config = json_loads(Path(config_path).read_bytes())
         
         # Validate required fields
         required_sections = ["osm", "cleaning", "postgis"]
@@ -105,13 +109,16 @@ def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
         config["postgis"].setdefault("create_index", True)
         config["postgis"].setdefault("chunk_size", None)
         config["postgis"].setdefault("geometry_type", "GEOMETRY")
+        config["postgis"].setdefault("spatial_sort", True)
+        config["postgis"].setdefault("cluster", False)
+        config["postgis"].setdefault("insert_method", "copy")
         
         return config
     
     except FileNotFoundError:
         logging.error(f"Config file not found at {config_path}")
         sys.exit(1)
-    except json.JSONDecodeError:
+    except JSONDecodeError:
         logging.error(f"Invalid JSON in config file {config_path}")
         sys.exit(1)
     except ValueError as e:
@@ -138,7 +145,10 @@ def run_pipeline(config: Dict[str, Any], args: argparse.Namespace) -> None:
         ensure_directory(raw_folder)
         
         raw_path = os.path.join(raw_folder, "osm_raw.geojson")
-        cleaned_path = os.path.join("data", "processed", "osm_cleaned.gpkg")
+        # Batched cleaning streams to a GeoPackage it can append to
+        batch_size = config["cleaning"].get("batch_size")
+        cleaned_name = "osm_cleaned.gpkg" if batch_size else "osm_cleaned.parquet"
+        cleaned_path = os.path.join("data", "processed", cleaned_name)
         ensure_directory(os.path.dirname(cleaned_path))
 
         # 1. Download OSM data (unless skipped)
@@ -147,7 +157,8 @@ def run_pipeline(config: Dict[str, Any], args: argparse.Namespace) -> None:
             downloader = OSMDownloader(
                 location_name,
                 tags=config["osm"].get("tags"),
-                timeout=config["osm"].get("timeout", 300)
+                timeout=config["osm"].get("timeout", 300),
+                use_cache=config["osm"].get("use_cache", True)
             )
             downloader.save(raw_path)
             logging.info(f"? OSM data saved to: {raw_path}")
@@ -155,20 +166,35 @@ def run_pipeline(config: Dict[str, Any], args: argparse.Namespace) -> None:
             logging.info("? Skipping OSM download")
 
         # 2. Clean and process data (unless skipped)
+        cleaned_gdf = None
         if not args.skip_clean:
             print_step("Cleaning and processing data", args.verbose)
-            cleaner = GeoCleaner(raw_path)
-            
-            cleaner.drop_null_and_empty()
-            cleaner.fix_invalid_geometries(method="make_valid")
-            cleaner.reproject(config["cleaning"]["target_crs"])
-            
-            # Optional column standardization
-            if config["cleaning"].get("standardize_columns", True):
-                cleaner.standardize_columns()
+            if batch_size:
+                written = clean_in_batches(
+                    raw_path,
+                    cleaned_path,
+                    target_crs=config["cleaning"]["target_crs"],
+                    standardize_columns=config["cleaning"].get("standardize_columns", True),
+                    batch_size=batch_size
+                )
+                logging.info(f"? Cleaned {written} features in batches to: {cleaned_path}")
+            else:
+                cleaner = GeoCleaner(raw_path)
+                
+                cleaner.drop_null_and_empty()
+                cleaner.fix_invalid_geometries(method="make_valid")
+                cleaner.reproject(config["cleaning"]["target_crs"])
                 
-            cleaner.save(cleaned_path)
-            logging.info(f"? Cleaned data saved to: {cleaned_path}")
+                # Optional column standardization
+                if config["cleaning"].get("standardize_columns", True):
+                    cleaner.standardize_columns()
+
+                # Hand the result to the loader in memory; the file is only needed
+                # when the database step runs later or the user asked for it
+                cleaned_gdf = cleaner.gdf
+                if args.skip_db or args.save_cleaned:
+                    cleaner.save(cleaned_path)
+                    logging.info(f"? Cleaned data saved to: {cleaned_path}")
         else:
             logging.info("? Skipping data cleaning")
 
@@ -191,10 +217,11 @@ def run_pipeline(config: Dict[str, Any], args: argparse.Namespace) -> None:
                     min_connections=1,
                     max_connections=5
                 ) as db_manager:
-                    # Ensure database exists
-                    db_created = db_manager.ensure_database(pg["database"])
-                    if db_created and args.verbose:
-                        db_manager.optimize_postgis_settings(pg["database"])
+                    # Ensure database exists, reusing one connection per database
+                    with db_manager.session():
+                        db_created = db_manager.ensure_database(pg["database"])
+                        if db_created and args.verbose:
+                            db_manager.optimize_postgis_settings(pg["database"])
                     
                     logging.info(f"? Database verified: {pg['database']}")
 
@@ -207,18 +234,25 @@ def run_pipeline(config: Dict[str, Any], args: argparse.Namespace) -> None:
                     # Get SRID from target CRS (e.g., "EPSG:4326" -> 4326)
                     srid = int(config["cleaning"]["target_crs"].split(":")[1])
                     
-                    loader = PostGISLoader(
-                        cleaned_path,
-                        db_url,
+                    loader_options = dict(
                         chunk_size=pg["chunk_size"],
                         geometry_type=pg["geometry_type"],
-                        srid=srid
+                        srid=srid,
+                        spatial_sort=pg["spatial_sort"],
+                        insert_method=pg["insert_method"]
                     )
+                    if cleaned_gdf is not None:
+                        loader = PostGISLoader.from_geodataframe(
+                            cleaned_gdf, db_url, **loader_options
+                        )
+                    else:
+                        loader = PostGISLoader(cleaned_path, db_url, **loader_options)
                     loader.load_to_postgis(
                         table_name=pg["table_name"],
                         schema=pg["schema"],
                         if_exists=pg["if_exists"],
-                        create_spatial_index=pg["create_index"]
+                        create_spatial_index=pg["create_index"],
+                        cluster=pg["cluster"]
                     )
                     logging.info(f"? Data loaded to table: {pg['schema']}.{pg['table_name']}")
                     
@@ -3,33 +3,102 @@
 PostgreSQL Database Manager
 
 Handles PostgreSQL/PostGIS database creation and management with:
-- Connection pooling
+- Per-database connection pooling
 - Comprehensive error handling
 - Extension management
 - Database configuration
 """
 
+import contextlib
+import functools
+import hashlib
 import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from psycopg2.pool import ThreadedConnectionPool
-from typing import Optional, List, Dict, Any
+from psycopg2.extensions import STATUS_READY
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence
+
+from cache import CACHE_FOLDER
+from copy_text import CopyTextReader
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# libpq options for pooled connections: detect dead peers within seconds
+# instead of waiting for the kernel's default retransmission timeout
+CONNECTION_OPTIONS = {
+    'application_name': 'osm-pipeline',
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3,
+    'tcp_user_timeout': 15000,
+}
+
+# Seconds a connection may sit idle before it is probed with SELECT 1 on checkout
+VALIDATION_INTERVAL = 30.0
+
+# Planner/executor settings stored per database with ALTER DATABASE ... SET;
+# they apply to every new connection to that database
+SESSION_GUCS = {
+    'maintenance_work_mem': '256MB',
+    'work_mem': '64MB',
+    'effective_cache_size': '3GB',
+    'random_page_cost': '1.1',
+    'geqo_threshold': '12',
+}
+
+# Settings that only take effect after a server restart; they belong in
+# postgresql.conf when the cluster is provisioned
+RESTART_GUCS = {
+    'shared_buffers': '1GB',
+}
+
+def _freeze(params: Optional[Any]) -> Optional[Any]:
+    """Hashable form of query params, used as part of the result cache key."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return frozenset(params.items())
+    return tuple(params)
+
+class PoolExhausted(PoolError):
+    """No usable connection could be obtained from a pool."""
+
 class PostgreSQLDatabaseManager:
+    # Statement templates, composed once rather than on every call
+    _SQL_DB_EXISTS = "SELECT EXISTS (SELECT 1 FROM pg_database WHERE datname = $1)"
+    _SQL_CREATE_DB = sql.SQL("CREATE DATABASE {} WITH TEMPLATE = {};")
+    # DO blocks take no bind parameters, so the names are inlined; they are
+    # checked against _EXTENSION_NAME first
+    _SQL_ENSURE_EXTS = (
+        "DO $$ DECLARE ext text; BEGIN "
+        "FOREACH ext IN ARRAY ARRAY[{}]::text[] LOOP "
+        "EXECUTE format('CREATE EXTENSION IF NOT EXISTS %I', ext); "
+        "END LOOP; END $$"
+    )
+    # Only has to keep names safe inside a single-quoted literal; the server
+    # quotes them with %I. Allows hyphenated names such as uuid-ossp
+    _EXTENSION_NAME = re.compile(r'[a-z_][a-z0-9_-]*')
+    _SQL_PREPARE = sql.SQL("PREPARE {} AS ")
+    _SQL_ALTER_DB_SET = sql.SQL("ALTER DATABASE {} SET {} = {};")
+
     def __init__(
         self,
         user: str,
         password: str,
         host: str,
         port: int = 5432,
-        min_connections: int = 1,
-        max_connections: int = 5,
-        extensions: Optional[List[str]] = None
+        min_connections: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        extensions: Optional[List[str]] = None,
+        max_uses: int = 50_000
     ):
         """
         Initialize database manager with connection pooling.
@@ -39,69 +108,301 @@ class PostgreSQLDatabaseManager:
             password: Database password
             host: Database host
             port: Database port
-            min_connections: Minimum connection pool size
-            max_connections: Maximum connection pool size
+            min_connections: Connections each database pool keeps open;
+                the pool closes any connection returned beyond this, so it
+                is the number of warm connections reused across checkouts
+                (default $OSM_PG_POOL_MIN or max(4, CPU count)). The
+                'postgres' maintenance pool keeps one
+            max_connections: Maximum connection pool size (default
+                $OSM_PG_POOL_MAX or 4 per CPU, capped at 50)
             extensions: List of extensions to ensure exist
+            max_uses: Queries (execute_sql, execute_many and copy_from_iter
+                calls) after which a connection is closed and replaced,
+                bounding per-session memory and prepared statements. The
+                check runs at checkout, so a connection pinned by session()
+                is retired once its session ends
         """
         self.user = user
         self.password = password
         self.host = host
         self.port = port
         self.extensions = extensions or ['postgis']
-        self._connection_pool = None
+        invalid = [e for e in self.extensions if not self._EXTENSION_NAME.fullmatch(e)]
+        if invalid:
+            raise ValueError(f"Invalid extension names: {invalid}")
+        # The extension statement never changes, so render it once
+        self._ext_stmt = self._SQL_ENSURE_EXTS.format(
+            ", ".join(f"'{e}'" for e in self.extensions)
+        )
+        cpus = os.cpu_count() or 1
+        self.max_connections = max_connections or int(
+            os.environ.get('OSM_PG_POOL_MAX', min(50, 4 * cpus))
+        )
+        # psycopg2 pools open min_connections eagerly and close every
+        # connection returned above it, so this is the warm set that survives
+        # between checkouts; connections up to the max are opened per burst
+        self.min_connections = min(
+            min_connections or int(os.environ.get('OSM_PG_POOL_MIN', max(4, cpus))),
+            self.max_connections
+        )
+        self.max_uses = max_uses
+        # One pool per database: a psycopg2 pool only ever connects to the
+        # database it was created for
+        self._pools: Dict[str, ThreadedConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+        # Database each checked-out connection came from, by id(conn)
+        self._checked_out: Dict[int, str] = {}
+        # Names of statements PREPAREd on each pooled connection, by id(conn);
+        # they live as long as the server session, across checkouts
+        self._prepared: Dict[int, set] = {}
+        # Number of queries run on each pooled connection, by id(conn)
+        self._uses: Dict[int, int] = {}
+        # time.monotonic() at which each pooled connection was last known
+        # good, by id(conn)
+        self._validated: Dict[int, float] = {}
+        # Results of cacheable SELECTs and databases known to exist this session
+        self._cached_select = functools.lru_cache(maxsize=1024)(self._select)
+        self._known_databases: set = set()
+        # Quoted identifiers by name, shared by all statement templates
+        self._ident_cache: Dict[str, sql.Identifier] = {}
+        # Per-thread {database: connection} pinned by session(), else None
+        self._local = threading.local()
         
-        # Initialize connection pool
-        self._init_connection_pool(min_connections, max_connections)
+        # Initialize the maintenance DB pool up front so bad credentials fail fast
+        self._get_pool('postgres')
 
-    def _init_connection_pool(self, min_conn: int, max_conn: int) -> None:
-        """Initialize threaded connection pool."""
-        try:
-            self._connection_pool = ThreadedConnectionPool(
-                minconn=min_conn,
-                maxconn=max_conn,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
-                database='postgres'  # Connect to maintenance DB initially
-            )
-            logger.info("Initialized connection pool")
-        except psycopg2.Error as e:
-            logger.error(f"Failed to initialize connection pool: {str(e)}")
-            raise
+    def _get_pool(self, database: str) -> ThreadedConnectionPool:
+        """Return the connection pool for database, creating it on first use."""
+        with self._pools_lock:
+            pool = self._pools.get(database)
+            if pool is None:
+                try:
+                    pool = ThreadedConnectionPool(
+                        # The maintenance database only serves one-off admin
+                        # statements, so it keeps a single warm connection
+                        minconn=1 if database == 'postgres' else self.min_connections,
+                        maxconn=self.max_connections,
+                        user=self.user,
+                        password=self.password,
+                        host=self.host,
+                        port=self.port,
+                        database=database,
+                        **CONNECTION_OPTIONS
+                    )
+                    logger.info("Initialized connection pool for '%s'", database)
+                except psycopg2.Error as e:
+                    logger.error("Failed to initialize connection pool: %s", e)
+                    raise
+                self._pools[database] = pool
+            return pool
 
     def get_connection(self, database: str = 'postgres') -> psycopg2.extensions.connection:
         """Get a connection from the pool for specified database."""
         try:
-            conn = self._connection_pool.getconn()
-            if conn.closed:
-                conn = psycopg2.connect(
-                    user=self.user,
-                    password=self.password,
-                    host=self.host,
-                    port=self.port,
-                    database=database
-                )
-            return conn
+            pool = self._get_pool(database)
+            # Every idle connection may have gone stale together (e.g. after a
+            # server restart), so keep evicting until one passes or the pool
+            # has been cycled through once
+            for _ in range(self.max_connections):
+                conn = pool.getconn()
+                if self._is_usable(conn):
+                    # An entry marks the connection as handed out at least once
+                    self._uses.setdefault(id(conn), 0)
+                    self._checked_out[id(conn)] = database
+                    return conn
+                # Evict dead or worn-out connections so the pool opens a fresh one
+                self._discard(pool, conn)
+            raise PoolExhausted(
+                f"No usable connection to '{database}' after "
+                f"{self.max_connections} attempts"
+            )
         except psycopg2.Error as e:
-            logger.error(f"Failed to get connection: {str(e)}")
+            logger.error("Failed to get connection: %s", e)
             raise
 
     def release_connection(self, conn: psycopg2.extensions.connection) -> None:
-        """Release a connection back to the pool."""
+        """Release a connection back to the pool it came from."""
+        database = self._checked_out.pop(id(conn), None)
         try:
-            self._connection_pool.putconn(conn)
+            self._pools[database].putconn(conn)
+            if conn.closed:
+                # The pool closes connections returned beyond minconn; drop their
+                # state before CPython hands the same id() to a new connection
+                self._forget(conn)
+            else:
+                self._validated[id(conn)] = time.monotonic()
         except Exception as e:
-            logger.warning(f"Error releasing connection: {str(e)}")
+            logger.warning("Error releasing connection: %s", e)
+            self._forget(conn)
             try:
                 conn.close()
             except Exception:
                 pass
 
+    def _is_usable(self, conn: psycopg2.extensions.connection) -> bool:
+        """Check a freshly checked-out connection before handing it to a caller.
+        
+        Connections the pool has just opened (never checked out before) and
+        connections returned within VALIDATION_INTERVAL are trusted; older
+        ones are probed with SELECT 1 so a half-open socket fails here,
+        bounded by tcp_user_timeout, instead of in the caller's first query.
+        """
+        if conn.closed or conn.status != STATUS_READY:
+            return False
+        if id(conn) not in self._uses:
+            return True
+        if self._uses[id(conn)] >= self.max_uses:
+            return False
+        if time.monotonic() - self._validated.get(id(conn), 0.0) < VALIDATION_INTERVAL:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        self._validated[id(conn)] = time.monotonic()
+        return True
+
+    def _count_use(self, conn: psycopg2.extensions.connection) -> None:
+        """Count a query against conn's max_uses budget."""
+        self._uses[id(conn)] = self._uses.get(id(conn), 0) + 1
+
+    def _forget(self, conn: psycopg2.extensions.connection) -> None:
+        """Drop bookkeeping for a connection that is being closed."""
+        self._prepared.pop(id(conn), None)
+        self._uses.pop(id(conn), None)
+        self._validated.pop(id(conn), None)
+
+    def _discard(
+        self,
+        pool: ThreadedConnectionPool,
+        conn: psycopg2.extensions.connection
+    ) -> None:
+        """Close a pooled connection and free its slot in the pool."""
+        self._forget(conn)
+        pool.putconn(conn, close=True)
+
+    @contextlib.contextmanager
+    def _connection(self, database: str = 'postgres') -> Iterator[psycopg2.extensions.connection]:
+        """Yield a connection to database: the session's pinned one, or a pooled one
+        that is released on exit."""
+        pinned = getattr(self._local, 'pinned', None)
+        if pinned is None:
+            conn = self.get_connection(database)
+            try:
+                yield conn
+            finally:
+                self.release_connection(conn)
+            return
+
+        conn = pinned.get(database)
+        if conn is None:
+            conn = pinned[database] = self.get_connection(database)
+        try:
+            yield conn
+        except psycopg2.Error:
+            # Leave the pinned connection usable for the rest of the session
+            if not conn.closed:
+                conn.rollback()
+            raise
+
+    @contextlib.contextmanager
+    def session(self, db_name: Optional[str] = None) -> Iterator["PostgreSQLDatabaseManager"]:
+        """
+        Pin pooled connections to the calling thread for a sequence of calls.
+        
+        Inside the block every method reuses one connection per database
+        instead of checking one out and back in per call, e.g.
+        ``with manager.session() as s: s.ensure_database(db);
+        s.optimize_postgis_settings(db)``. Nested sessions share the
+        outer one's connections.
+        
+        Args:
+            db_name: Existing database to pin a connection for up front;
+                others are pinned on first use. Leave unset when the block
+                may create the database, since pinning connects right away
+        """
+        if getattr(self._local, 'pinned', None) is not None:
+            yield self
+            return
+
+        self._local.pinned = {}
+        try:
+            if db_name is not None:
+                self._local.pinned[db_name] = self.get_connection(db_name)
+            yield self
+        finally:
+            pinned, self._local.pinned = self._local.pinned, None
+            for conn in pinned.values():
+                self.release_connection(conn)
+
+    def _ident(self, name: str) -> sql.Identifier:
+        """Return the cached sql.Identifier for name."""
+        ident = self._ident_cache.get(name)
+        if ident is None:
+            ident = self._ident_cache[name] = sql.Identifier(name)
+        return ident
+
+    def _execute_prepared(
+        self,
+        conn: psycopg2.extensions.connection,
+        cur: psycopg2.extensions.cursor,
+        stmt_name: str,
+        query: str,
+        params: Optional[Sequence] = None
+    ) -> None:
+        """Run query as a named server-side prepared statement, preparing it once per connection."""
+        prepared = self._prepared.setdefault(id(conn), set())
+        if stmt_name not in prepared:
+            cur.execute(
+                self._SQL_PREPARE.format(self._ident(stmt_name)) + sql.SQL(query)
+            )
+            prepared.add(stmt_name)
+
+        params = tuple(params or ())
+        arguments = "(" + ", ".join(["%s"] * len(params)) + ")" if params else ""
+        cur.execute(
+            sql.SQL("EXECUTE {}" + arguments).format(self._ident(stmt_name)),
+            params or None
+        )
+
+    def _marker_path(self, db_name: str) -> Path:
+        """On-disk marker recording that db_name was set up with these extensions."""
+        # The readable parts are reduced to filename-safe characters so no
+        # name can reach outside CACHE_FOLDER; the key keeps names that
+        # collapse to the same text apart
+        key = hashlib.blake2b(
+            repr((self.host, self.port, db_name, sorted(self.extensions))).encode(),
+            digest_size=8
+        ).hexdigest()
+        host, db = (re.sub(r'[^A-Za-z0-9.-]', '_', name) for name in (self.host, db_name))
+        return CACHE_FOLDER / f"{host}_{self.port}_{db}_{key}.ok"
+
+    def _is_marked(self, db_name: str) -> bool:
+        """Whether an earlier run set up db_name and it still accepts connections."""
+        marker = self._marker_path(db_name)
+        if not marker.exists():
+            return False
+        try:
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                conn.commit()
+            return True
+        except psycopg2.Error as e:
+            logger.info("Ignoring stale setup marker for '%s': %s", db_name, e)
+            marker.unlink(missing_ok=True)
+            return False
+
     def ensure_database(self, db_name: str, template: str = 'template1') -> bool:
         """
         Ensure database exists with PostGIS extension.
         
+        A successful setup is recorded in CACHE_FOLDER; later runs only
+        check that the database accepts connections and skip the catalog
+        lookup and extension statement. Delete the marker to force a full
+        check, e.g. after dropping an extension by hand.
+        
         Args:
             db_name: Name of database to ensure
             template: Template database to use
@@ -109,124 +410,264 @@ class PostgreSQLDatabaseManager:
         Returns:
             bool: True if database was created, False if it already existed
         """
-        try:
-            conn = self.get_connection()
-            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-            cur = conn.cursor()
+        if db_name not in self._known_databases and self._is_marked(db_name):
+            logger.info("Database '%s' already set up", db_name)
+            self._known_databases.add(db_name)
+            return False
 
-            # Check if database exists
-            cur.execute(
-                sql.SQL("SELECT 1 FROM pg_database WHERE datname = {};").format(
-                    sql.Literal(db_name)
-                )
-            )
-            exists = cur.fetchone()
-
-            if not exists:
-                logger.info(f"Creating database '{db_name}'")
-                cur.execute(
-                    sql.SQL("CREATE DATABASE {} WITH TEMPLATE = {};").format(
-                        sql.Identifier(db_name),
-                        sql.Identifier(template)
-                    )
-                )
-                created = True
+        marker = self._marker_path(db_name)
+        try:
+            created = False
+            if db_name in self._known_databases:
+                logger.info("Database '%s' already exists", db_name)
             else:
-                logger.info(f"Database '{db_name}' already exists")
-                created = False
+                with self._connection() as conn:
+                    # CREATE DATABASE refuses to run inside a transaction block
+                    conn.commit()
+                    conn.autocommit = True
+                    try:
+                        with conn.cursor() as cur:
+                            # Check if database exists; always returns exactly one boolean row
+                            self._execute_prepared(
+                                conn,
+                                cur,
+                                "db_exists",
+                                self._SQL_DB_EXISTS,
+                                (db_name,)
+                            )
+                            exists = cur.fetchone()[0]
+
+                            if not exists:
+                                logger.info("Creating database '%s'", db_name)
+                                cur.execute(
+                                    self._SQL_CREATE_DB.format(
+                                        self._ident(db_name),
+                                        self._ident(template)
+                                    )
+                                )
+                                created = True
+                            else:
+                                logger.info("Database '%s' already exists", db_name)
+                    finally:
+                        conn.autocommit = False
 
-            cur.close()
-            self.release_connection(conn)
+                self._known_databases.add(db_name)
 
             # Ensure extensions in the new database
             self._ensure_extensions(db_name)
 
-            return created
-
         except psycopg2.Error as e:
-            logger.error(f"Error ensuring database '{db_name}': {str(e)}")
+            logger.error("Error ensuring database '%s': %s", db_name, e)
+            marker.unlink(missing_ok=True)
             raise
 
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+        except OSError as e:
+            logger.warning("Could not record setup marker: %s", e)
+        return created
+
     def _ensure_extensions(self, db_name: str) -> None:
         """Ensure required extensions exist in database."""
         try:
-            conn = self.get_connection(db_name)
-            cur = conn.cursor()
-
-            for extension in self.extensions:
-                cur.execute(
-                    sql.SQL("CREATE EXTENSION IF NOT EXISTS {};").format(
-                        sql.Identifier(extension)
-                    )
-                logger.info(f"Ensured extension '{extension}' in '{db_name}'")
-
-            conn.commit()
-            cur.close()
-            self.release_connection(conn)
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                # One server-side block creates every extension, in list order
+                cur.execute(self._ext_stmt)
+                conn.commit()
+            logger.info("Ensured extensions %s in '%s'", self.extensions, db_name)
 
         except psycopg2.Error as e:
-            logger.error(f"Error ensuring extensions: {str(e)}")
+            logger.error("Error ensuring extensions: %s", e)
             raise
 
-    def execute_sql(self, db_name: str, query: str, params: Optional[Dict] = None) -> Any:
+    def execute_sql(
+        self,
+        db_name: str,
+        query: str,
+        params: Optional[Any] = None,
+        stmt_name: Optional[str] = None,
+        cacheable: bool = False
+    ) -> Any:
         """
         Execute SQL query with parameters.
         
         Args:
             db_name: Database name
             query: SQL query to execute
-            params: Dictionary of query parameters
+            params: Dictionary of query parameters, or a sequence of values
+                for the $1..$n placeholders when stmt_name is given
+            stmt_name: Run the query as this server-side prepared statement,
+                skipping parse/plan on repeat calls over the same connection
+            cacheable: Serve repeat calls from an in-process cache; only for
+                SELECTs whose answer cannot change underneath the pipeline
             
         Returns:
             Query results if applicable
         """
+        if cacheable:
+            return list(self._cached_select(db_name, query, _freeze(params), stmt_name))
+
+        results = self._execute(db_name, query, params, stmt_name)
+        if results is None:
+            # Something was written; cached reads may now be stale
+            self.invalidate_cache()
+        return results
+
+    def _select(
+        self,
+        db_name: str,
+        query: str,
+        params: Optional[Any],
+        stmt_name: Optional[str]
+    ) -> tuple:
+        """Run a read for the result cache, taking params in frozen form."""
+        if isinstance(params, frozenset):
+            params = dict(params)
+        return tuple(self._execute(db_name, query, params, stmt_name) or ())
+
+    def _execute(
+        self,
+        db_name: str,
+        query: str,
+        params: Optional[Any] = None,
+        stmt_name: Optional[str] = None
+    ) -> Optional[List[tuple]]:
+        """Run one statement on a pooled connection; commit if it returns no rows."""
         try:
-            conn = self.get_connection(db_name)
-            cur = conn.cursor()
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                self._count_use(conn)
+                if stmt_name:
+                    self._execute_prepared(conn, cur, stmt_name, query, params)
+                else:
+                    cur.execute(query, params or {})
 
-            cur.execute(query, params or {})
-            
-            if cur.description:  # If query returns results
-                results = cur.fetchall()
-            else:
-                results = None
+                if cur.description:  # If query returns results
+                    return cur.fetchall()
+                conn.commit()
+                return None
+
+        except psycopg2.Error as e:
+            logger.error("SQL execution failed: %s", e)
+            raise
+
+    def invalidate_cache(self) -> None:
+        """Forget cached SELECT results and known databases, e.g. after DDL."""
+        self._cached_select.cache_clear()
+        self._known_databases.clear()
+
+    def execute_many(
+        self,
+        db_name: str,
+        query: str,
+        argslist: Sequence,
+        page_size: int = 1000,
+        template: Optional[str] = None
+    ) -> None:
+        """
+        Execute a statement for every parameter set, page_size rows per round-trip.
+        
+        Args:
+            db_name: Database name
+            query: SQL statement; with template, an INSERT ... VALUES %s
+            argslist: Sequence of parameter tuples or dicts
+            page_size: Number of parameter sets sent per server round-trip
+            template: Row template for execute_values (e.g. "(%s, %s)")
+        """
+        try:
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                self._count_use(conn)
+                if template is not None and "VALUES %s" in query:
+                    execute_values(cur, query, argslist, template=template, page_size=page_size)
+                else:
+                    execute_batch(cur, query, argslist, page_size=page_size)
                 conn.commit()
+            self.invalidate_cache()
 
-            cur.close()
-            self.release_connection(conn)
-            return results
+        except psycopg2.Error as e:
+            logger.error("Batch execution failed: %s", e)
+            raise
+
+    def copy_from_iter(
+        self,
+        db_name: str,
+        table: str,
+        columns: Sequence[str],
+        row_iter: Iterable[Sequence[Any]],
+        sep: str = '\t'
+    ) -> int:
+        """
+        Bulk load rows with COPY FROM STDIN, streaming them as they are produced.
+        
+        Args:
+            db_name: Database name
+            table: Target table, optionally schema-qualified ("schema.table")
+            columns: Column names matching the order of values in each row
+            row_iter: Iterable of row sequences; None is loaded as NULL and
+                geometries should be passed as (hex) EWKB or WKT
+            sep: Column delimiter, a single character
+            
+        Returns:
+            Number of rows copied
+        """
+        statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT text, DELIMITER {})").format(
+            sql.Identifier(*table.split('.')),
+            sql.SQL(', ').join(self._ident(column) for column in columns),
+            sql.Literal(sep)
+        )
+        try:
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                self._count_use(conn)
+                cur.copy_expert(statement, CopyTextReader(row_iter, sep))
+                copied = cur.rowcount
+                conn.commit()
+            self.invalidate_cache()
+            logger.info("Copied %d rows into %s", copied, table)
+            return copied
 
         except psycopg2.Error as e:
-            logger.error(f"SQL execution failed: {str(e)}")
+            logger.error("COPY into %s failed: %s", table, e)
             raise
 
     def optimize_postgis_settings(self, db_name: str) -> None:
-        """Configure optimal PostGIS settings for spatial workloads."""
-        settings = {
-            'shared_buffers': '1GB',
-            'maintenance_work_mem': '256MB',
-            'work_mem': '64MB',
-            'effective_cache_size': '3GB',
-            'random_page_cost': '1.1',
-            'geqo_threshold': '12'
-        }
+        """
+        Configure PostGIS-friendly settings for db_name.
         
+        SESSION_GUCS are stored on the database and picked up by every
+        connection opened afterwards; RESTART_GUCS cannot be changed at
+        runtime and are only reported.
+        """
         try:
-            for name, value in settings.items():
-                self.execute_sql(
-                    db_name,
-                    f"ALTER SYSTEM SET {name} = %s;",
-                    (value,)
+            with self._connection(db_name) as conn, conn.cursor() as cur:
+                # All settings in one multi-statement round-trip
+                cur.execute(
+                    sql.SQL("").join(
+                        self._SQL_ALTER_DB_SET.format(
+                            self._ident(db_name), self._ident(name), sql.Literal(value)
+                        )
+                        for name, value in SESSION_GUCS.items()
+                    )
                 )
-            logger.info("Optimized PostGIS settings")
+                conn.commit()
+            logger.info("Optimized PostGIS settings for '%s'", db_name)
+            logger.warning(
+                "Set these in postgresql.conf (requires a restart): %s",
+                ", ".join(f"{name} = {value}" for name, value in RESTART_GUCS.items())
+            )
         except psycopg2.Error as e:
-            logger.warning(f"Could not optimize settings: {str(e)}")
+            logger.warning("Could not optimize settings: %s", e)
 
     def close(self) -> None:
-        """Close all connections in the pool."""
-        if self._connection_pool:
-            self._connection_pool.closeall()
-            logger.info("Closed all database connections")
+        """Close all connections in every pool."""
+        with self._pools_lock:
+            for pool in self._pools.values():
+                pool.closeall()
+            self._pools.clear()
+        self._checked_out.clear()
+        self._prepared.clear()
+        self._uses.clear()
+        self._validated.clear()
+        logger.info("Closed all database connections")
 
     def __enter__(self):
         return self
@@ -237,6 +678,7 @@ class PostgreSQLDatabaseManager:
 if __name__ == "__main__":
     # Example command-line usage
     import argparse
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--user", required=True, help="Database username")
     parser.add_argument("--password", required=True, help="Database password")